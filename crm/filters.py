@@ -1,5 +1,5 @@
 import django_filters
-from django_filters import DateRangeFilter, CharFilter, RangeFilter, Filter
+from django_filters import DateTimeFilter, CharFilter, RangeFilter, Filter
 from .models import Customer, Product, Order # Import your models
 from django.db.models import Q, CharField
 
@@ -11,15 +11,16 @@ class CustomerFilter(django_filters.FilterSet):
     name = CharFilter(lookup_expr='icontains')
     email = CharFilter(lookup_expr='icontains')
 
-    # Date Range Filter for created_at (gives us __gte and __lte fields automatically)
-    created_at = DateRangeFilter()
+    # Explicit bounds for created_at; each is a range scan on the created_at index
+    created_at_gte = DateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_at_lte = DateTimeFilter(field_name='created_at', lookup_expr='lte')
 
     # Define the custom filter for phone pattern matching (Challenge)
     phone_pattern = CharFilter(method='filter_by_phone_pattern')
 
     class Meta:
         model = Customer
-        fields = ['name', 'email', 'created_at'] # These are the standard fields we are exposing
+        fields = ['name', 'email'] # These are the standard fields we are exposing
 
         order_by = ['name','email', 'created_at']
         
@@ -78,8 +79,9 @@ class OrderFilter(django_filters.FilterSet):
     # Range Filter for total_amount (__gte and __lte lookups)
     total_amount = django_filters.RangeFilter()
     
-    # Date Range Filter for order_date (__gte and __lte lookups)
-    order_date = django_filters.DateRangeFilter()
+    # Explicit bounds for order_date (__gte and __lte lookups on the order_date index)
+    order_date_gte = django_filters.DateTimeFilter(field_name='order_date', lookup_expr='gte')
+    order_date_lte = django_filters.DateTimeFilter(field_name='order_date', lookup_expr='lte')
     
     # Filter Orders by Customer Name (Foreign Key Relationship)
     customer_name = django_filters.CharFilter(
@@ -101,7 +103,7 @@ class OrderFilter(django_filters.FilterSet):
     
     class Meta:
         model = Order
-        fields = ['total_amount', 'order_date'] # These are the direct fields
+        fields = ['total_amount'] # These are the direct fields
         order_by = ['total_amount', 'order_date']
 
         
\ No newline at end of file
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# Columns searched with icontains by CustomerFilter, ProductFilter and OrderFilter.
+# Django compiles icontains on PostgreSQL to UPPER("col"::text) LIKE UPPER(...),
+# so the indexes are built on that same expression to be usable
+TRIGRAM_INDEXES = [
+    ('cust_name_trgm', 'crm_customer', 'name'),
+    ('cust_email_trgm', 'crm_customer', 'email'),
+    ('prod_name_trgm', 'crm_product', 'name'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # pg_trgm only exists on PostgreSQL; other backends keep plain LIKE scans
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" '
+            f'USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0002_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-15 19:53
+
+import re
+
+from django.db import migrations, models
+
+# Same pattern as crm.models.PHONE_REGEX at the time of this migration
+PHONE_RE = re.compile(r'^\+?1?[0-9]{9,15}$')
+
+
+def clear_invalid_phones(apps, schema_editor):
+    # Existing rows that break the format would make AddConstraint fail,
+    # so drop those phone numbers rather than the customers
+    Customer = apps.get_model('crm', 'Customer')
+    invalid = [
+        pk
+        for pk, phone in Customer.objects.exclude(phone__isnull=True).exclude(phone='').values_list('pk', 'phone')
+        if not PHONE_RE.fullmatch(phone)
+    ]
+    Customer.objects.filter(pk__in=invalid).update(phone=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0003_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_invalid_phones, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='customer',
+            constraint=models.CheckConstraint(condition=models.Q(('phone__isnull', True), ('phone', ''), ('phone__regex', '^\\+?1?[0-9]{9,15}$'), _connector='OR'), name='valid_phone'),
+        ),
+    ]
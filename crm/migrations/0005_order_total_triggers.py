@@ -0,0 +1,69 @@
+from django.db import migrations
+
+# An order's total is the sum of its products' current prices, recomputed
+# whenever a row is added to, moved within or removed from its product set.
+# It is not a price snapshot: editing Product.price alone leaves existing
+# order totals untouched until that order's product set changes again.
+ORDER_TOTAL_SQL = """
+    UPDATE crm_order SET total_amount = (
+        SELECT COALESCE(SUM(p.price), 0)
+        FROM crm_product p
+        JOIN crm_order_products op ON op.product_id = p.id
+        WHERE op.order_id = {row}.order_id
+    )
+    WHERE id = {row}.order_id;
+"""
+
+# Refresh OLD as well as NEW on UPDATE so an order losing a join row is recomputed
+FORWARD = [
+    f"""
+    CREATE OR REPLACE FUNCTION crm_order_refresh_total() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            {ORDER_TOTAL_SQL.format(row='OLD')}
+        END IF;
+        IF TG_OP = 'DELETE' THEN
+            RETURN OLD;
+        END IF;
+        {ORDER_TOTAL_SQL.format(row='NEW')}
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER crm_order_products_total
+    AFTER INSERT OR UPDATE OR DELETE ON crm_order_products
+    FOR EACH ROW EXECUTE FUNCTION crm_order_refresh_total()
+    """,
+]
+
+BACKWARD = [
+    'DROP TRIGGER IF EXISTS crm_order_products_total ON crm_order_products',
+    'DROP FUNCTION IF EXISTS crm_order_refresh_total()',
+]
+
+
+# PostgreSQL only: SQLite rebuilds a table for most ALTERs, and a trigger body
+# naming crm_order or crm_product would make any later rebuild of them fail.
+# Elsewhere CreateOrder's aggregate keeps the total correct on its own.
+def create_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in FORWARD:
+            schema_editor.execute(statement)
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in BACKWARD:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0004_customer_valid_phone'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -1,6 +1,12 @@
+from decimal import Decimal
+
 from django.db import models
+from django.db.models import Q
 import uuid
 
+# Shared by the database constraint and the GraphQL input validation
+PHONE_REGEX = r'^\+?1?[0-9]{9,15}$'
+
 # Create your models here.
 class Customer(models.Model):
     name = models.CharField(max_length=100)
@@ -8,6 +14,19 @@ class Customer(models.Model):
     phone = models.CharField(max_length=20, blank = True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Back the created_at range filters
+        indexes = [
+            models.Index(fields=['created_at'], name='cust_created_at_idx'),
+        ]
+        # Enforce the phone format in SQL so bulk inserts are validated too
+        constraints = [
+            models.CheckConstraint(
+                condition=Q(phone__isnull=True) | Q(phone='') | Q(phone__regex=PHONE_REGEX),
+                name='valid_phone',
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -24,8 +43,10 @@ class Order(models.Model):
     id = models.UUIDField(default=uuid.uuid4, primary_key=True,  editable=False)
     customer = models.ForeignKey(Customer, on_delete = models.CASCADE)
     products = models.ManyToManyField(Product)
-    total_amount = models.DecimalField(max_digits=10, decimal_places = 2, default = 0.00)
-    order_date = models.DateTimeField(auto_now_add = True)
+    # Sum of current product prices; on PostgreSQL a join-table trigger
+    # recomputes it whenever the product set changes (see migration 0005)
+    total_amount = models.DecimalField(max_digits=10, decimal_places = 2, default = Decimal('0.00'))
+    order_date = models.DateTimeField(auto_now_add = True, db_index = True)
 
     def __str__(self):
         return f"Order {self.id} for {self.customer.name}"
@@ -1,19 +1,103 @@
+import re
+from decimal import Decimal
+
 import graphene
 from graphene import relay
+from graphene.relay import PageInfo
+from graphene_django import bypass_get_queryset
 from graphene_django.types import DjangoObjectType
 from graphene.types import InputObjectType
-from django.core.exceptions import ObjectDoesNotExist
-from django.db import transaction
-from .models import Customer, Product, Order
-from django.core.validators import RegexValidator
+from graphene.utils.str_converters import to_snake_case
+from graphql.language import FragmentSpreadNode, InlineFragmentNode
+from graphql_relay.utils import base64, unbase64
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Manager, QuerySet, Sum
+from .models import Customer, Product, Order, PHONE_REGEX
+from django.core.validators import validate_email
 from graphene_django.filter import DjangoFilterConnectionField
 from .filters import CustomerFilter, ProductFilter, OrderFilter
 
-# Define a custom Phone Validator for the argument 
-phone_validator = RegexValidator(
-    regex=r'^\+?1?\d{9,15}$', # Simple regex for common international format
-    message="Phone number must be entered in the format: '+999999999'. Up to 15 digits allowed."
-)
+# Compile the phone pattern once; matching it directly avoids building a
+# ValidationError on every invalid input. fullmatch() rejects a trailing
+# newline, which `$` alone lets through but the database CHECK does not
+_PHONE_RE = re.compile(PHONE_REGEX) # Simple regex for common international format
+PHONE_ERROR_MESSAGE = "Phone number must be entered in the format: '+999999999'. Up to 15 digits allowed."
+
+def _field_selections(info, selection_set):
+    """Yield the field nodes of a selection set, expanding inline and named fragments."""
+    for selection in selection_set.selections:
+        if isinstance(selection, FragmentSpreadNode):
+            yield from _field_selections(info, info.fragments[selection.name.value].selection_set)
+        elif isinstance(selection, InlineFragmentNode):
+            yield from _field_selections(info, selection.selection_set)
+        else:
+            yield selection
+
+
+def _selected_node_fields(info):
+    """Return the snake_case field names selected under `edges { node { ... } }`."""
+    names = set()
+
+    def walk(selection_set, in_node):
+        for selection in _field_selections(info, selection_set):
+            if in_node:
+                names.add(to_snake_case(selection.name.value))
+            elif selection.name.value in ('edges', 'node') and selection.selection_set:
+                walk(selection.selection_set, selection.name.value == 'node')
+
+    for field_node in info.field_nodes:
+        if field_node.selection_set:
+            walk(field_node.selection_set, False)
+    return names
+
+
+def _selects_path(info, *path):
+    """Return True if the current field's selection includes the nested camelCase `path`."""
+    selection_sets = [node.selection_set for node in info.field_nodes if node.selection_set]
+    for name in path:
+        selection_sets = [
+            selection.selection_set
+            for selection_set in selection_sets
+            for selection in _field_selections(info, selection_set)
+            if selection.name.value == name
+        ]
+        if not selection_sets:
+            return False
+    return True
+
+
+def _prime_related(instance, name, rows):
+    """Fill the prefetch cache of a to-many relation so resolvers reuse `rows`."""
+    related = getattr(instance, name).all()
+    related._result_cache = list(rows)
+    related._prefetch_done = True
+    if not hasattr(instance, '_prefetched_objects_cache'):
+        instance._prefetched_objects_cache = {}
+    instance._prefetched_objects_cache[name] = related
+
+
+def _as_queryset(queryset):
+    """Return the queryset behind a related manager, keeping any prefetched rows."""
+    if isinstance(queryset, Manager):
+        return queryset.get_queryset()
+    return queryset
+
+
+def _only_selected_columns(queryset, info):
+    """Restrict a connection queryset to the columns the query actually selects."""
+    queryset = _as_queryset(queryset)
+    # Prefetched querysets are already loaded; cloning them would re-query per parent
+    if queryset._result_cache is not None:
+        return queryset
+    model = queryset.model
+    selected = _selected_node_fields(info)
+    columns = [
+        field.name for field in model._meta.concrete_fields
+        if field.name in selected and not field.is_relation
+    ]
+    return queryset.only(model._meta.pk.name, *columns)
+
 
 # Define the types that mutations will return
 class CustomerType(DjangoObjectType):
@@ -24,6 +108,10 @@ class CustomerType(DjangoObjectType):
         filter_fields = ()
         # connection_class = CustomerConnection
 
+    @classmethod
+    def get_queryset(cls, queryset, info):
+        return _only_selected_columns(queryset, info)
+
 class ProductType(DjangoObjectType):
     class Meta:
         model = Product
@@ -32,6 +120,10 @@ class ProductType(DjangoObjectType):
         filter_fields = ()
         # connection_class = ProductConnection
 
+    @classmethod
+    def get_queryset(cls, queryset, info):
+        return _only_selected_columns(queryset, info)
+
 
 class OrderType(DjangoObjectType):
     class Meta:
@@ -41,6 +133,25 @@ class OrderType(DjangoObjectType):
         filter_fields = ()
         # connection_class = OrderConnection
 
+    @classmethod
+    def get_queryset(cls, queryset, info):
+        queryset = _as_queryset(queryset)
+        if queryset._result_cache is not None:
+            return queryset
+        # Load each order's customer and products up front, but only when selected
+        selected = _selected_node_fields(info)
+        if 'customer' in selected:
+            queryset = queryset.select_related('customer')
+        if 'products' in selected:
+            queryset = queryset.prefetch_related('products')
+        return queryset
+
+    # The customer is already joined by get_queryset, so skip the per-row
+    # re-fetch through CustomerType.get_queryset
+    @bypass_get_queryset
+    def resolve_customer(self, info):
+        return self.customer
+
 class CustomerConnection(relay.Connection):
     class Meta:
         # Reference the *string* name of the node type
@@ -54,6 +165,98 @@ class OrderConnection(relay.Connection):
     class Meta:
         node = OrderType
 
+KEYSET_CURSOR_PREFIX = "keyset:"
+
+class LimitedFilterConnectionField(DjangoFilterConnectionField):
+    """Filter connection that clamps page sizes instead of returning whole tables."""
+    max_page_size = 100
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('max_limit', self.max_page_size)
+        super().__init__(*args, **kwargs)
+
+    @classmethod
+    def connection_resolver(cls, resolver, connection, default_manager, queryset_resolver,
+                            max_limit, enforce_first_or_last, root, info, **args):
+        # Clamp oversized requests rather than rejecting them
+        for arg in ('first', 'last'):
+            if max_limit and args.get(arg) and args[arg] > max_limit:
+                args[arg] = max_limit
+        return super().connection_resolver(
+            resolver, connection, default_manager, queryset_resolver,
+            max_limit, enforce_first_or_last, root, info, **args
+        )
+
+    @classmethod
+    def resolve_queryset(cls, connection, iterable, info, args, filtering_args, filterset_class):
+        queryset = super().resolve_queryset(
+            connection, iterable, info, args, filtering_args, filterset_class
+        )
+        # Slice on the primary key index so LIMIT stays cheap and pages are stable
+        if not queryset.ordered:
+            queryset = queryset.order_by('pk')
+        return queryset
+
+    @classmethod
+    def resolve_connection(cls, connection, args, iterable, max_limit=None):
+        after = args.get('after')
+        first = args.get('first')
+        # Keyset pagination only applies to forward paging over pk-ordered querysets;
+        # anything else (last/before/offset, offset or malformed cursors) keeps the
+        # default slicing, which ignores cursors it cannot decode
+        if (
+            not isinstance(iterable, QuerySet)
+            or tuple(iterable.query.order_by) != ('pk',)
+            or args.get('last') is not None or args.get('before') or args.get('offset')
+            or (first is not None and first < 0)
+        ):
+            return super().resolve_connection(connection, args, iterable, max_limit=max_limit)
+        after_pk = cls.keyset_cursor_to_pk(after, iterable.model) if after else None
+        if after and after_pk is None:
+            return super().resolve_connection(connection, args, iterable, max_limit=max_limit)
+
+        if first is None:
+            first = max_limit
+        queryset = iterable.filter(pk__gt=after_pk) if after_pk is not None else iterable
+        # Fetch one extra row to learn whether another page exists, without a COUNT
+        if first is None:
+            rows, has_next_page = list(queryset), False
+        else:
+            rows = list(queryset[:first + 1])
+            has_next_page = len(rows) > first
+            rows = rows[:first]
+
+        edges = [connection.Edge(node=row, cursor=cls.pk_to_keyset_cursor(row.pk)) for row in rows]
+        result = connection(
+            edges=edges,
+            page_info=PageInfo(
+                start_cursor=edges[0].cursor if edges else None,
+                end_cursor=edges[-1].cursor if edges else None,
+                has_previous_page=after_pk is not None,
+                has_next_page=has_next_page,
+            ),
+        )
+        result.iterable = iterable
+        return result
+
+    @staticmethod
+    def pk_to_keyset_cursor(pk):
+        return base64(f"{KEYSET_CURSOR_PREFIX}{pk}")
+
+    @staticmethod
+    def keyset_cursor_to_pk(cursor, model):
+        """Decode a keyset cursor into a primary key of `model`, or None if it is invalid."""
+        try:
+            value = unbase64(cursor)
+        except Exception:
+            return None
+        if not value.startswith(KEYSET_CURSOR_PREFIX):
+            return None
+        try:
+            return model._meta.pk.to_python(value[len(KEYSET_CURSOR_PREFIX):])
+        except (ValidationError, ValueError):
+            return None
+
 # --- 2. INPUT TYPES (For complex inputs like BulkCreate) ---
 
 class CustomerInput(InputObjectType):
@@ -83,6 +286,7 @@ class CreateOrder(graphene.Mutation):
     class Arguments:
         input = OrderInput(required=True)
 
+    @staticmethod
     def mutate(root, info, input=None):
 
         customer_id = input.customer_id
@@ -90,26 +294,28 @@ class CreateOrder(graphene.Mutation):
         order_date = input.order_date
 
         # 1. Input Validation and Fetching
-        try:
-            # Check if customer exists
-            customer = Customer.objects.get(pk=customer_id)
-        except ObjectDoesNotExist:
+        # Check if customer exists (a None check is cheaper than raising DoesNotExist)
+        customer = Customer.objects.filter(pk=customer_id).first()
+        if customer is None:
             return CreateOrder(order=None, message=f"Error: Customer ID {customer_id} not found.")
 
         # Check if products exist and if list is not empty (implicit validation)
         if not product_ids:
             return CreateOrder(order=None, message="Error: Order must contain at least one product.")
         
-        products = Product.objects.filter(id__in=product_ids)
+        # Validate the products and compute the total in a single aggregate query
+        totals = Product.objects.filter(id__in=product_ids).aggregate(
+            total=Sum('price'),
+            n=Count('id'),
+        )
         
-        # Check if all provided product IDs were valid
-        if products.count() != len(product_ids):
+        # Check if all provided product IDs were valid (duplicates count once)
+        if totals['n'] != len(set(product_ids)):
             # This is complex, but for simplicity, we'll just return a generic error
             return CreateOrder(order=None, message="Error: One or more product IDs were invalid.")
 
-        # 2. Server-side Calculation of Total Amount
-        # sum() needs the values to be cast to float/decimal for calculation
-        total_amount = sum(product.price for product in products)
+        # 2. Server-side Calculation of Total Amount (done by the database above)
+        total_amount = (totals['total'] or Decimal('0')).quantize(Decimal('0.01'))
         
         # 3. Create the Order and Relationships
         with transaction.atomic():
@@ -119,8 +325,18 @@ class CreateOrder(graphene.Mutation):
                 total_amount=total_amount,
                 order_date=order_date # Defaults to now if None
             )
-            # Save the Many-to-Many relationship
-            order.products.set(products) 
+            # Save the Many-to-Many relationship: the order is new, so insert the
+            # join rows directly instead of letting set() diff against existing ones
+            through = Order.products.through
+            through.objects.bulk_create(
+                [through(order_id=order.pk, product_id=product_id) for product_id in set(product_ids)],
+                ignore_conflicts=True,
+            )
+        
+        # Prime the products cache when the payload asks for them, so the
+        # response costs one SELECT instead of a COUNT plus a join query
+        if _selects_path(info, 'order', 'products'):
+            _prime_related(order, 'products', Product.objects.filter(id__in=product_ids))
         
         # 4. Return Success
         return CreateOrder(order=order, message="Order created successfully with calculated total.")
@@ -135,6 +351,7 @@ class CreateProduct(graphene.Mutation):
         price = graphene.Decimal(required= True)
         stock = graphene.Int()
 
+    @staticmethod
     def mutate(root, info, name, price, stock=0):
         # 1. Price Validation (Must be positive)
         if price <= 0:
@@ -170,26 +387,35 @@ class CreateCustomer(graphene.Mutation):
         email = graphene.String(required = True)
         phone = graphene.String()
 
-    def mutate(root, inf, name, email, phone=None):
-        # 1. Check for Duplicates (Email Uniqueness)
-        if Customer.objects.filter(email=email).exists():
-            # 2. Handle Error: Return the message and a null customer
-            return CreateCustomer(customer=None, message=f"Error: Customer with email {email} already exists.")
+    @staticmethod
+    def mutate(root, info, name, email, phone=None):
+        # 1. Email Format Validation (cheap, no database access)
+        try:
+            validate_email(email)
+        except ValidationError:
+            return CreateCustomer(customer=None, message=f"Error: Email {email} is not a valid email address.")
         
         # 2. Add Phone Validation Check here
-        if phone:
-            try:
-                phone_validator(phone)
-            except ValidationError as e:
-                # Return the specific error message from the validator
-                return CreateCustomer(customer=None, message=f"Error: Phone number invalid. Details: {e.message}")
+        if phone and not _PHONE_RE.fullmatch(phone):
+            return CreateCustomer(customer=None, message=f"Error: Phone number invalid. Details: {PHONE_ERROR_MESSAGE}")
         
-        # 3. Create Object (If unique)
-        customer = Customer.objects.create(
-            name=name, 
-            email=email, 
-            phone=phone
-        )
+        # 3. Create Object, letting the unique email index reject duplicates
+        try:
+            with transaction.atomic():
+                customer = Customer.objects.create(
+                    name=name, 
+                    email=email, 
+                    phone=phone
+                )
+        except IntegrityError as e:
+            # Only the unique email index means a duplicate; report anything else as is
+            if Customer.objects.filter(email=email).exists():
+                return CreateCustomer(customer=None, message=f"Error: Customer with email {email} already exists.")
+            return CreateCustomer(customer=None, message=f"Error: Customer could not be created. Details: {e}")
+
+        # A new customer has no orders yet; answer orderSet without a query
+        if _selects_path(info, 'customer', 'orderSet'):
+            _prime_related(customer, 'order_set', [])
         
         # 4. Return Success
         return CreateCustomer(
@@ -206,33 +432,73 @@ class BulkCreateCustomers(graphene.Mutation):
         # Input is a List of the CustomerInput type
         customers_data = graphene.List(CustomerInput, required=True) 
 
+    @staticmethod
+    def insert_customers(customers):
+        # Only the INSERT runs in a transaction; validation and email lookups stay outside it
+        if not customers:
+            return []
+        with transaction.atomic():
+            return Customer.objects.bulk_create(customers, batch_size=1000)
+
+    @staticmethod
     def mutate(root, info, customers_data):
-        created_customers = []
         errors = []
-        
-        # Use a transaction to ensure database consistency for the bulk operation
-        with transaction.atomic():
-            for i, data in enumerate(customers_data):
-                email = data.get('email')
-                name = data.get('name')
-                phone = data.get('phone')
-
-                # Basic Validation: Check for required fields and uniqueness
-                if not name:
-                    errors.append(f"Record {i}: Name is required.")
-                    continue
-
-                if Customer.objects.filter(email=email).exists():
-                    errors.append(f"Record {i}: Customer with email {email} already exists.")
-                    continue
-                
-                # If validation passes, create the customer object
-                customer = Customer.objects.create(
-                    name=name,
-                    email=email,
-                    phone=phone
-                )
-                created_customers.append(customer)
+        to_create = []
+
+        # Look up every incoming email in one query instead of one per record
+        incoming_emails = [data.get('email') for data in customers_data]
+        taken = set(
+            Customer.objects.filter(email__in=incoming_emails).values_list('email', flat=True)
+        )
+        # Accepted email -> record index; also catches duplicates within the batch
+        accepted = {}
+
+        for i, data in enumerate(customers_data):
+            email = data.get('email')
+            name = data.get('name')
+            phone = data.get('phone')
+
+            # Basic Validation: Check for required fields and uniqueness
+            if not name:
+                errors.append(f"Record {i}: Name is required.")
+                continue
+
+            if email in taken or email in accepted:
+                errors.append(f"Record {i}: Customer with email {email} already exists.")
+                continue
+
+            if phone and not _PHONE_RE.fullmatch(phone):
+                errors.append(f"Record {i}: Phone number invalid. Details: {PHONE_ERROR_MESSAGE}")
+                continue
+            accepted[email] = i
+
+            # If validation passes, queue the customer object for insertion
+            to_create.append(Customer(name=name, email=email, phone=phone))
+
+        # Insert all valid customers in a single round trip
+        try:
+            created_customers = BulkCreateCustomers.insert_customers(to_create)
+        except IntegrityError:
+            # Another request inserted some of these emails after the lookup above:
+            # report those records and insert the rest in one more round trip
+            taken = set(
+                Customer.objects.filter(email__in=list(accepted)).values_list('email', flat=True)
+            )
+            errors.extend(
+                f"Record {accepted[email]}: Customer with email {email} already exists."
+                for email in sorted(taken, key=accepted.get)
+            )
+            to_create = [customer for customer in to_create if customer.email not in taken]
+            try:
+                created_customers = BulkCreateCustomers.insert_customers(to_create)
+            except IntegrityError as e:
+                created_customers = []
+                errors.append(f"Bulk insert failed, no customers were created. Details: {e}")
+
+        # New customers have no orders yet; answer orderSet without a query each
+        if _selects_path(info, 'customers', 'orderSet'):
+            for customer in created_customers:
+                _prime_related(customer, 'order_set', [])
 
         # Return the results
         return BulkCreateCustomers(customers=created_customers, errors=errors)
@@ -245,18 +511,18 @@ class Query(graphene.ObjectType):
         return "CRM GraphQL API is up and running!"
 
     # All customers query
-    all_customers = DjangoFilterConnectionField(
+    all_customers = LimitedFilterConnectionField(
         CustomerType,
         filterset_class = CustomerFilter
     )
 
     # All products Query
-    all_products = DjangoFilterConnectionField(
+    all_products = LimitedFilterConnectionField(
         ProductType,
         filterset_class = ProductFilter
     )
 
-    all_orders = DjangoFilterConnectionField(
+    all_orders = LimitedFilterConnectionField(
         OrderType,
         filterset_class = OrderFilter
     )
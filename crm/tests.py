@@ -1,3 +1,264 @@
-from django.test import TestCase
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.db import IntegrityError, connection
+from django.test import RequestFactory, TestCase
+from graphql_relay.utils import base64
+
+from alx_backend_graphql_crm.schema import schema
+from .models import Customer, Order, Product
+from .schema import BulkCreateCustomers
+
+
+def execute(query, **variables):
+    result = schema.execute(query, variable_values=variables, context_value=RequestFactory().post('/graphql'))
+    assert result.errors is None, result.errors
+    return result.data
+
+
+CREATE_CUSTOMER = '''
+    mutation($name: String!, $email: String!, $phone: String) {
+        createCustomer(name: $name, email: $email, phone: $phone) { customer { name } message }
+    }
+'''
+
+BULK_CREATE_CUSTOMERS = '''
+    mutation($data: [CustomerInput]!) {
+        bulkCreateCustomers(customersData: $data) { customers { email } errors }
+    }
+'''
+
+
+class CustomerPhoneValidationTests(TestCase):
+    def test_create_customer_rejects_phone_with_trailing_newline(self):
+        data = execute(CREATE_CUSTOMER, name="Ann", email="ann@example.com", phone="+1234567890\n")
+
+        self.assertIsNone(data['createCustomer']['customer'])
+        self.assertIn("Phone number invalid", data['createCustomer']['message'])
+        self.assertFalse(Customer.objects.exists())
+
+    def test_create_customer_rejects_non_ascii_digits(self):
+        # Python's \d would accept these but PostgreSQL's CHECK would not
+        data = execute(CREATE_CUSTOMER, name="Ann", email="ann@example.com", phone="+١٢٣٤٥٦٧٨٩٠")
+
+        self.assertIsNone(data['createCustomer']['customer'])
+        self.assertIn("Phone number invalid", data['createCustomer']['message'])
+
+    def test_bulk_create_reports_bad_phone_per_record(self):
+        data = execute(BULK_CREATE_CUSTOMERS, data=[
+            {"name": "Ann", "email": "ann@example.com", "phone": "+1234567890\n"},
+            {"name": "Bob", "email": "bob@example.com", "phone": "+1234567890"},
+        ])
+
+        payload = data['bulkCreateCustomers']
+        self.assertEqual([c['email'] for c in payload['customers']], ["bob@example.com"])
+        self.assertEqual(len(payload['errors']), 1)
+        self.assertTrue(payload['errors'][0].startswith("Record 0: Phone number invalid"))
+
+    def test_create_customer_reports_duplicate_email(self):
+        Customer.objects.create(name="Ann", email="ann@example.com")
+
+        data = execute(CREATE_CUSTOMER, name="Ann", email="ann@example.com")
+
+        self.assertEqual(
+            data['createCustomer']['message'],
+            "Error: Customer with email ann@example.com already exists.",
+        )
+
+    def test_create_customer_only_maps_unique_email_violation_to_duplicate(self):
+        with mock.patch.object(
+            Customer.objects, 'create', side_effect=IntegrityError("CHECK constraint failed: valid_phone")
+        ):
+            data = execute(CREATE_CUSTOMER, name="Ann", email="ann@example.com", phone="+1234567890")
+
+        message = data['createCustomer']['message']
+        self.assertNotIn("already exists", message)
+        self.assertIn("valid_phone", message)
+
+
+class BulkCreateCustomersTests(TestCase):
+    def test_duplicate_email_within_batch_is_reported_once(self):
+        data = execute(BULK_CREATE_CUSTOMERS, data=[
+            {"name": "Ann", "email": "ann@example.com"},
+            {"name": "Ann Again", "email": "ann@example.com"},
+            {"name": "Bob", "email": "bob@example.com"},
+        ])
+
+        payload = data['bulkCreateCustomers']
+        self.assertEqual([c['email'] for c in payload['customers']], ["ann@example.com", "bob@example.com"])
+        self.assertEqual(payload['errors'], ["Record 1: Customer with email ann@example.com already exists."])
+        self.assertEqual(Customer.objects.get(email="ann@example.com").name, "Ann")
+
+    def test_email_inserted_after_lookup_is_reported_and_rest_created(self):
+        insert_customers = BulkCreateCustomers.insert_customers
+        calls = []
+
+        def insert_after_concurrent_request(customers):
+            # Another request claims bob@ between the email lookup and the INSERT
+            if not calls:
+                Customer.objects.create(name="Other Bob", email="bob@example.com")
+            calls.append(len(customers))
+            return insert_customers(customers)
+
+        with mock.patch.object(BulkCreateCustomers, 'insert_customers', side_effect=insert_after_concurrent_request):
+            data = execute(BULK_CREATE_CUSTOMERS, data=[
+                {"name": "Ann", "email": "ann@example.com"},
+                {"name": "Bob", "email": "bob@example.com"},
+                {"name": "Cid", "email": "cid@example.com"},
+            ])
+
+        payload = data['bulkCreateCustomers']
+        self.assertEqual(calls, [3, 2])
+        self.assertEqual([c['email'] for c in payload['customers']], ["ann@example.com", "cid@example.com"])
+        self.assertEqual(payload['errors'], ["Record 1: Customer with email bob@example.com already exists."])
+        self.assertEqual(Customer.objects.get(email="bob@example.com").name, "Other Bob")
+        self.assertEqual(Customer.objects.count(), 3)
+
+
+class CreateOrderTests(TestCase):
+    CREATE_ORDER = '''
+        mutation($customerId: ID!, $productIds: [ID]!) {
+            createOrder(input: {customerId: $customerId, productIds: $productIds}) {
+                order { totalAmount products { edges { node { name price } } } }
+                message
+            }
+        }
+    '''
+
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Ann", email="ann@example.com")
+        self.laptop = Product.objects.create(name="Laptop", price=Decimal("10.50"))
+        self.mouse = Product.objects.create(name="Mouse", price=Decimal("2.25"))
+
+    def create_order(self, *product_ids):
+        return execute(
+            self.CREATE_ORDER, customerId=self.customer.pk, productIds=[str(pk) for pk in product_ids]
+        )['createOrder']
+
+    def test_total_is_the_sum_of_product_prices(self):
+        payload = self.create_order(self.laptop.pk, self.mouse.pk)
+
+        self.assertEqual(payload['message'], "Order created successfully with calculated total.")
+        self.assertEqual(Decimal(payload['order']['totalAmount']), Decimal("12.75"))
+        self.assertEqual(Order.objects.get().total_amount, Decimal("12.75"))
+
+    def test_duplicate_product_ids_are_inserted_once(self):
+        payload = self.create_order(self.laptop.pk, self.laptop.pk)
+
+        self.assertIsNotNone(payload['order'])
+        self.assertEqual(Decimal(payload['order']['totalAmount']), Decimal("10.50"))
+        self.assertEqual(Order.products.through.objects.count(), 1)
+
+    def test_unknown_product_id_is_rejected(self):
+        payload = self.create_order(self.laptop.pk, "00000000-0000-0000-0000-000000000000")
+
+        self.assertIsNone(payload['order'])
+        self.assertEqual(payload['message'], "Error: One or more product IDs were invalid.")
+        self.assertFalse(Order.objects.exists())
+
+    def test_payload_products_match_the_order(self):
+        payload = self.create_order(self.laptop.pk, self.mouse.pk)
+
+        products = sorted(
+            (edge['node']['name'], Decimal(edge['node']['price']))
+            for edge in payload['order']['products']['edges']
+        )
+        self.assertEqual(products, [("Laptop", Decimal("10.50")), ("Mouse", Decimal("2.25"))])
+
+
+@skipUnless(connection.vendor == 'postgresql', "total triggers are PostgreSQL-only")
+class OrderTotalTriggerTests(TestCase):
+    def setUp(self):
+        customer = Customer.objects.create(name="Ann", email="ann@example.com")
+        self.laptop = Product.objects.create(name="Laptop", price=Decimal("10.50"))
+        self.mouse = Product.objects.create(name="Mouse", price=Decimal("2.25"))
+        self.order = Order.objects.create(customer=customer)
+        self.other_order = Order.objects.create(customer=customer)
+
+    def total(self, order):
+        order.refresh_from_db(fields=['total_amount'])
+        return order.total_amount
+
+    def test_total_follows_product_insert_and_delete(self):
+        self.order.products.add(self.laptop, self.mouse)
+        self.assertEqual(self.total(self.order), Decimal("12.75"))
+
+        self.order.products.remove(self.mouse)
+        self.assertEqual(self.total(self.order), Decimal("10.50"))
+
+        self.order.products.clear()
+        self.assertEqual(self.total(self.order), Decimal("0.00"))
+
+    def test_moving_a_join_row_refreshes_both_orders(self):
+        self.order.products.add(self.laptop, self.mouse)
+        Order.products.through.objects.filter(order=self.order, product=self.mouse).update(
+            order=self.other_order
+        )
+
+        self.assertEqual(self.total(self.order), Decimal("10.50"))
+        self.assertEqual(self.total(self.other_order), Decimal("2.25"))
+
+
+class KeysetPaginationTests(TestCase):
+    CUSTOMERS_PAGE = '''
+        query($first: Int, $after: String) {
+            allCustomers(first: $first, after: $after) {
+                edges { node { name } }
+                pageInfo { hasNextPage hasPreviousPage endCursor }
+            }
+        }
+    '''
+
+    ORDERS_PAGE = '''
+        query($first: Int, $after: String) {
+            allOrders(first: $first, after: $after) { edges { node { totalAmount } } }
+        }
+    '''
+
+    def setUp(self):
+        for name in ("Ann", "Bob", "Cid"):
+            Customer.objects.create(name=name, email=f"{name.lower()}@example.com")
+
+    def names(self, connection):
+        return [edge['node']['name'] for edge in connection['edges']]
+
+    def test_next_page_continues_after_cursor(self):
+        first = execute(self.CUSTOMERS_PAGE, first=2)['allCustomers']
+        self.assertEqual(self.names(first), ["Ann", "Bob"])
+        self.assertTrue(first['pageInfo']['hasNextPage'])
+        self.assertFalse(first['pageInfo']['hasPreviousPage'])
+
+        second = execute(self.CUSTOMERS_PAGE, first=2, after=first['pageInfo']['endCursor'])['allCustomers']
+        self.assertEqual(self.names(second), ["Cid"])
+        self.assertFalse(second['pageInfo']['hasNextPage'])
+        self.assertTrue(second['pageInfo']['hasPreviousPage'])
+
+    def test_has_next_page_is_false_on_exact_fit(self):
+        page = execute(self.CUSTOMERS_PAGE, first=3)['allCustomers']
+        self.assertEqual(len(page['edges']), 3)
+        self.assertFalse(page['pageInfo']['hasNextPage'])
+
+    def test_first_zero_returns_no_rows(self):
+        page = execute(self.CUSTOMERS_PAGE, first=0)['allCustomers']
+        self.assertEqual(page['edges'], [])
+        self.assertTrue(page['pageInfo']['hasNextPage'])
+
+    def test_first_above_max_limit_is_clamped(self):
+        Customer.objects.bulk_create(
+            Customer(name=f"Customer {i}", email=f"customer{i}@example.com") for i in range(110)
+        )
+
+        page = execute(self.CUSTOMERS_PAGE, first=150)['allCustomers']
+        self.assertEqual(len(page['edges']), 100)
+        self.assertTrue(page['pageInfo']['hasNextPage'])
+
+    def test_bad_keyset_cursor_is_ignored(self):
+        bad_cursor = base64("keyset:abc")
+
+        customers = execute(self.CUSTOMERS_PAGE, first=2, after=bad_cursor)['allCustomers']
+        self.assertEqual(self.names(customers), ["Ann", "Bob"])
+
+        customer = Customer.objects.first()
+        Order.objects.create(customer=customer)
+        orders = execute(self.ORDERS_PAGE, first=1, after=bad_cursor)['allOrders']
+        self.assertEqual(len(orders['edges']), 1)